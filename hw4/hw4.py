@@ -1,5 +1,14 @@
 import numpy as np
 import pandas as pd
+from scipy.special import expit
+from scipy.linalg import cho_factor, cho_solve, LinAlgError
+from joblib import Parallel, delayed
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, without it the jitted helpers run as plain numpy code
+    def njit(*args, **kwargs):
+        return lambda func: func
 from matplotlib.colors import ListedColormap
 import matplotlib.pyplot as plt
 
@@ -15,19 +24,19 @@ def pearson_correlation(x, y):
     Returns:
     - The Pearson correlation coefficient between the two columns.    
     """
-    # Ensure that x and y are numpy arrays
-    x = np.array(x)
-    y = np.array(y)
+    # Ensure that x and y are float numpy arrays (no copy if they already are)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
     
-    # Calculate the means of x and y
-    mean_x = np.mean(x)
-    mean_y = np.mean(y)
+    # Calculate the deviations of x and y from their means
+    dx = x - x.mean()
+    dy = y - y.mean()
     
     # Calculate the numerator of the Pearson correlation coefficient
-    numerator = np.sum((x - mean_x) * (y - mean_y))
+    numerator = dx.dot(dy)
     
     # Calculate the denominator of the Pearson correlation coefficient
-    denominator = np.sqrt(np.sum((x - mean_x)**2) * np.sum((y - mean_y)**2))
+    denominator = np.sqrt(dx.dot(dx) * dy.dot(dy))
     
     # Calculate the Pearson correlation coefficient
     result = numerator / denominator
@@ -48,20 +57,20 @@ def feature_selection(X, y, n_features=5):
 
     y = np.array(y)
     X["date"] = pd.to_numeric(pd.to_datetime(X["date"]))
-    # Initialize an empty list to store the feature names and their correlation coefficients
-    correlations = []
-    
-    # Iterate over each feature in the dataframe
-    for feature in X.columns:
-        corr = pearson_correlation(X[feature], y)
-        correlations.append((feature, abs(corr)))
-    
-    # Sort the features by the absolute value of their correlation coefficient in descending order
-    correlations.sort(key=lambda x: x[1], reverse=True)
-    
-    # Select the top n_features
-    best_features = [feature for feature, _ in correlations[:n_features]]
-    
+    # Calculate the correlation of every feature with y at once
+    X_values = X.to_numpy(dtype=np.float64)
+    X_centered = X_values - X_values.mean(axis=0)
+    y_centered = y - y.mean()
+    numerator = X_centered.T.dot(y_centered)
+    denominator = np.sqrt((X_centered**2).sum(axis=0) * y_centered.dot(y_centered))
+    correlations = np.abs(numerator / denominator)
+
+    # Select the top n_features, ordered by the absolute value of their correlation coefficient
+    n_features = min(n_features, len(correlations))
+    top = np.argpartition(-correlations, n_features - 1)[:n_features]
+    top = top[np.argsort(-correlations[top], kind="stable")]
+    best_features = X.columns[top].tolist()
+
     return best_features
 
 class LogisticRegressionGD(object):
@@ -79,26 +88,46 @@ class LogisticRegressionGD(object):
     random_state : int
       Random number generator seed for random weight
       initialization.
+    batch_size : int or None
+      Number of examples used for each gradient update (None uses full-batch gradient descent).
+    smoothing : int
+      With mini-batches, the convergence test compares the mean cost of the last smoothing
+      passes to the mean of the smoothing passes before them, since single passes are noisy.
+    snapshot_every : int
+      Store a copy of theta every snapshot_every passes (0 keeps only the final theta).
+    solver : str
+      'sgd' for (full-batch or mini-batch) gradient descent, or 'newton' for full Newton (IRLS) steps,
+      which ignore eta and batch_size and suit a small number of features.
     """
 
-    def __init__(self, eta=0.00005, n_iter=10000, eps=0.000001, random_state=1):
+    def __init__(self, eta=0.00005, n_iter=10000, eps=0.000001, random_state=1, batch_size=None,
+                 smoothing=10, snapshot_every=0, solver='sgd'):
         self.eta = eta
         self.n_iter = n_iter
         self.eps = eps
         self.random_state = random_state
+        self.batch_size = batch_size
+        self.smoothing = smoothing
+        self.snapshot_every = snapshot_every
+        if solver not in ('sgd', 'newton'):
+            raise ValueError("solver must be 'sgd' or 'newton', got %r" % (solver,))
+        self.solver = solver
 
         # model parameters
         self.theta = None
 
         # iterations history
-        self.Js = []
+        self.Js = np.empty(0)
         self.thetas = []
 
     def fit(self, X, y):
         """
         Fit training data (the learning phase).
-        Update the theta vector in each iteration using gradient descent.
-        Store the theta vector in self.thetas.
+        Update the theta vector using gradient descent over the full data, or, when
+        batch_size is set, mini-batch gradient descent: each iteration is then one pass
+        over a shuffled copy of the data in chunks of batch_size.
+        Store the cost over the full data after every pass in self.Js, and a copy
+        of the theta vector every snapshot_every passes (and at the end) in self.thetas.
         Stop the function when the difference between the previous cost and the current is less than eps
         or when you reach n_iter.
         The learned parameters must be saved in self.theta.
@@ -116,18 +145,51 @@ class LogisticRegressionGD(object):
         # set random seed
         np.random.seed(self.random_state)
         X = self.apply_bias_trick(X)
-        self.theta = np.random.random(X.shape[1])
-        
+        y = np.asarray(y, dtype=np.float64)
+        m = X.shape[0]
+        if self.solver == 'newton':
+            # full Newton steps can overshoot from a random start on unscaled data, zero is always safe
+            self.theta = np.zeros(X.shape[1])
+        else:
+            self.theta = np.random.random(X.shape[1])
+        self.Js = np.empty(self.n_iter)
+        self.thetas = []
+
+        mini_batch = self.solver != 'newton' and self.batch_size is not None and self.batch_size < m
+        window = self.smoothing
+
+        i = -1
+        prev_cost = np.inf
         for i in range(self.n_iter):
-          sigmoid = self.sigmoid(X.dot(self.theta))
-          gradient = self.eta * (X.T.dot(sigmoid - y))
-          self.theta = self.theta - gradient
-          self.thetas.append(self.theta)
-          self.Js.append(self.cost_function(sigmoid, y))
-          
-          if i > 1 and (self.Js[-2] - self.Js[-1]) < self.eps:
+          if self.solver == 'newton':
+            self.theta = self.newton_step(X, y, self.theta)
+            cost = self.cost_function(X.dot(self.theta), y)
+          elif mini_batch:
+            perm = np.random.permutation(m)
+            self.theta = sgd_epoch(X, y, self.theta, self.eta, perm, self.batch_size)
+            cost = self.cost_function(X.dot(self.theta), y)
+          else:
+            # the cost of the current theta reuses the same X.dot(theta) as the gradient
+            z = X.dot(self.theta)
+            sigmoid, cost = self.sigmoid_and_cost(z, y)
+            self.theta = self.theta - self.eta * (sigmoid - y).dot(X)
+          if self.snapshot_every and i % self.snapshot_every == 0:
+            self.thetas.append(self.theta.copy())
+          self.Js[i] = cost
+
+          if mini_batch:
+            # compare the mean cost of the last two windows of passes to average out the sampling noise
+            if i + 1 >= 2 * window and (self.Js[i + 1 - 2 * window:i + 1 - window].mean()
+                                        - self.Js[i + 1 - window:i + 1].mean()) < self.eps:
+              break
+          elif i > 1 and prev_cost - cost < self.eps:
             break
-          
+          prev_cost = cost
+
+        self.Js = self.Js[:i + 1]
+        if not self.snapshot_every or i % self.snapshot_every != 0:
+            self.thetas.append(self.theta.copy())
+
     def predict(self, X):
         """
         Return the predicted class labels for a given instance.
@@ -135,19 +197,44 @@ class LogisticRegressionGD(object):
         ----------
         X : {array-like}, shape = [n_examples, n_features]
         """
-        X = self.apply_bias_trick(X)
-        h_x = self.sigmoid(X.dot(self.theta))
+        # theta[0] is the bias, so add it directly instead of copying X with a column of ones
+        X = np.asarray(X).reshape(len(X), -1)
+        h_x = self.sigmoid(X.dot(self.theta[1:]) + self.theta[0])
         preds = np.where(h_x >= 0.5, 1,0)
         
         return preds
     
+    def newton_step(self, X, y, theta):
+        """
+        Take one Newton (IRLS) step over the full data: theta - H^-1 * gradient,
+        solving with the Cholesky factor of the Hessian. When the Hessian is singular
+        (e.g. linearly dependent features) the least-squares solution is used instead.
+        """
+        sigmoid = self.sigmoid(X.dot(theta))
+        gradient = (sigmoid - y).dot(X)
+        hessian = (X * (sigmoid * (1 - sigmoid))[:, np.newaxis]).T.dot(X)
+
+        try:
+            step = cho_solve(cho_factor(hessian), gradient)
+        except LinAlgError:
+            step = np.linalg.lstsq(hessian, gradient, rcond=None)[0]
+
+        return theta - step
+
     def sigmoid(self, X):
-        return 1 / (1 + np.exp(-X))
-    
-    def cost_function(self, h, y):
-        m = h.shape[0]
-        
-        return (y.dot(np.log(h)) + (1-y).dot(np.log(1-h))) / -m
+        return expit(X)
+
+    def sigmoid_and_cost(self, z, y):
+        # sigmoid and log-loss of z = X.dot(theta) from a single exp(-|z|) pass, overflow-safe for any z
+        e = np.exp(-np.abs(z))
+        sigmoid = np.where(z >= 0, 1.0, e) / (1 + e)
+        cost = np.mean(np.maximum(z, 0) + np.log1p(e) - y * z)
+
+        return sigmoid, cost
+
+    def cost_function(self, z, y):
+        # log-loss written in terms of z = X.dot(theta): log(1 + e^z) - y*z
+        return np.mean(np.logaddexp(0, z) - y * z)
 
     def apply_bias_trick(self, X):
       """
@@ -160,11 +247,50 @@ class LogisticRegressionGD(object):
       - X: Input data with an additional column of ones in the
           zeroth position (m instances over n+1 features).
       """
-      ones_matrix = np.ones(X.shape[0]) # create a vector of ones
+      X = np.asarray(X).reshape(len(X), -1)
+      # fill one preallocated (contiguous float64) matrix instead of stacking a column of ones onto X
+      X_bias = np.empty((X.shape[0], X.shape[1] + 1))
+      X_bias[:, 0] = 1.0
+      X_bias[:, 1:] = X
       
-      return np.column_stack((ones_matrix, X))
+      return X_bias
     
-def cross_validation(X, y, folds, algo, random_state):
+@njit(fastmath=True, cache=True)
+def sgd_epoch(X, y, theta, eta, perm, batch_size):
+    """
+    Run one pass of mini-batch gradient descent for logistic regression.
+
+    Input:
+    - X: Input data after the bias trick (m instances over n+1 features).
+    - y: True labels as floats (m instances).
+    - theta: The current parameters (n+1 values).
+    - eta: The learning rate.
+    - perm: The order in which to visit the m instances.
+    - batch_size: Number of instances used for each update.
+
+    Returns the updated theta.
+    """
+    theta = theta.copy()
+    # buffers for X_batch.dot(theta) -> sigmoid and for sigmoid - y, reused by every batch
+    z_buffer = np.empty(min(batch_size, perm.shape[0]))
+    residual_buffer = np.empty_like(z_buffer)
+    for start in range(0, perm.shape[0], batch_size):
+        idx = perm[start:start + batch_size]
+        X_batch = X[idx]
+        z = z_buffer[:idx.shape[0]]
+        residual = residual_buffer[:idx.shape[0]]
+        np.dot(X_batch, theta, z)
+        np.negative(z, z)
+        np.exp(z, z)
+        z += 1.0
+        np.reciprocal(z, z)
+        np.subtract(z, y[idx], residual)
+        # residual.dot(X_batch) is X_batch.T.dot(residual) read row by row, without a transposed view
+        theta -= eta * residual.dot(X_batch)
+
+    return theta
+
+def cross_validation(X, y, folds, algo, random_state, n_jobs=1):
     """
     This function performs cross validation as seen in class.
 
@@ -184,6 +310,10 @@ def cross_validation(X, y, folds, algo, random_state):
     random_state : int
       Random number generator seed for random weight
       initialization.
+    n_jobs : number of folds to train in parallel (int, -1 uses all cores).
+      With n_jobs=1 algo is fitted in place and is left fitted on the last fold;
+      otherwise every fold is fitted on a copy of algo in a worker process and
+      algo itself is left unchanged.
 
     Returns the cross validation accuracy.
     """
@@ -196,20 +326,14 @@ def cross_validation(X, y, folds, algo, random_state):
     X_shuffled = X[shuffled_indices]
     y_shuffled = y[shuffled_indices]
     num_of_elements = X.shape[0] // folds
-    elements_lst = list(range(X.shape[0]))
-    for i in range(1, folds + 1):
-      start_threshhold = (i - 1) * num_of_elements
-      end_threshhold = i * num_of_elements
-      test_list = elements_lst[start_threshhold:end_threshhold]
-      X_train = np.delete(X_shuffled, test_list, axis = 0)
-      X_test = X_shuffled[test_list]
-      y_train = np.delete(y_shuffled, test_list, axis = 0)
-      y_test = y_shuffled[test_list]
-      algo.fit(X_train, y_train)
-      test_predict = algo.predict(X_test)
-      fold_accuracy = np.mean(test_predict == y_test)
-      cv_accuracy += fold_accuracy
-      
+    # leftover elements (when folds does not divide m) get an id >= folds and always train
+    fold_ids = np.arange(X.shape[0]) // num_of_elements
+    test_masks = [fold_ids == i for i in range(folds)]
+    fold_accuracies = Parallel(n_jobs=n_jobs)(
+        delayed(fold_accuracy)(algo, X_shuffled[~mask], y_shuffled[~mask], X_shuffled[mask], y_shuffled[mask])
+        for mask in test_masks)
+    cv_accuracy = sum(fold_accuracies)
+
     return cv_accuracy / folds
 
     # set random seed
@@ -224,6 +348,15 @@ def cross_validation(X, y, folds, algo, random_state):
     ###########################################################################
     return cv_accuracy
 
+def fold_accuracy(algo, X_train, y_train, X_test, y_test):
+    """
+    Train algo on a single fold and return its accuracy on the held out part.
+    """
+    algo.fit(X_train, y_train)
+    test_predict = algo.predict(X_test)
+
+    return np.mean(test_predict == y_test)
+
 def norm_pdf(data, mu, sigma):
     """
     Calculate normal desnity function for a given data,
@@ -236,7 +369,11 @@ def norm_pdf(data, mu, sigma):
  
     Returns the normal distribution pdf according to the given mu and sigma for the given x.    
     """
-    p = (1 / (sigma * np.sqrt(2 * np.pi))) * np.exp(-(data - mu)**2 /(2 * (sigma**2)))
+    # the constants only depend on sigma, so compute them before touching the data.
+    # (2 * np.pi) ** 0.5 is a python float, so float32 inputs stay float32
+    scale = 1 / (sigma * (2 * np.pi) ** 0.5)
+    exponent = -0.5 / sigma**2
+    p = scale * np.exp(exponent * (data - mu)**2)
     
     return p
 
@@ -265,9 +402,13 @@ class EM(object):
         np.random.seed(self.random_state)
 
         self.responsibilities = None
+        self.params = None
         self.weights = None
         self.mus = None
         self.sigmas = None
+        self.pdf_scales = None
+        self.pdf_exponents = None
+        self.log_data_pdf = None
         self.costs = []
 
     # initial guesses for parameters
@@ -275,36 +416,62 @@ class EM(object):
         """
         Initialize distribution params
         """
-        self.weights = np.ones(self.k) / self.k
+        # weights, mus and sigmas are contiguous rows of one packed [3, k] array
+        self.params = np.empty((3, self.k))
+        self.weights, self.mus, self.sigmas = self.params
+
+        self.weights[:] = 1 / self.k
 
         # initialize mus by selecting random data points
         random_indices = np.random.choice(len(data), self.k, replace=False)
-        self.mus = data[random_indices]
+        self.mus[:] = data[random_indices].flatten()
+
+        self.sigmas[:] = np.std(data)
+        self.update_pdf_constants()
 
-        self.sigmas = np.full(self.k, np.std(data))
+    def update_pdf_constants(self):
+        """
+        Precompute weight / (sigma * sqrt(2 * pi)) and -1 / (2 * sigma^2) of every gaussian
+        so the E step is a single multiply inside and outside the exp.
+        """
+        self.pdf_scales = self.weights / (self.sigmas * np.sqrt(2 * np.pi))
+        self.pdf_exponents = -0.5 / self.sigmas**2
 
     def expectation(self, data):
         """
         E step - This function should calculate and update the responsibilities
         """        
-        self.responsibilities =  np.zeros((data.shape[0],0))
-        for i in range(self.k):
-            likelihood_col_i = self.weights[i] * norm_pdf(data, self.mus[i], self.sigmas[i])
-            self.responsibilities = np.c_[self.responsibilities, likelihood_col_i]
-
-        row_sums = self.responsibilities.sum(axis=1)
-        self.responsibilities = self.responsibilities / row_sums[:, np.newaxis]
+        # broadcast the m data points against the k gaussians into an (m, k) matrix
+        data = data.reshape(-1, 1)
+        likelihoods = self.pdf_scales * np.exp(self.pdf_exponents * (data - self.mus)**2)
+
+        # the row sums are the gmm pdf of each data point
+        data_pdf = likelihoods.sum(axis=1)
+        with np.errstate(divide='ignore'):
+            self.log_data_pdf = np.log(data_pdf)
+
+        # a point far enough from every gaussian underflows to a zero row sum; redo only those rows
+        # in log space, shifted by the row max, which keeps the responsibilities and the log pdf finite
+        far = data_pdf == 0
+        if far.any():
+            log_likelihoods = np.log(self.pdf_scales) + self.pdf_exponents * (data[far] - self.mus)**2
+            row_max = log_likelihoods.max(axis=1, keepdims=True)
+            likelihoods[far] = np.exp(log_likelihoods - row_max)
+            data_pdf[far] = likelihoods[far].sum(axis=1)
+            self.log_data_pdf[far] = row_max[:, 0] + np.log(data_pdf[far])
+
+        self.responsibilities = likelihoods / data_pdf[:, np.newaxis]
 
     def maximization(self, data):
         """
         M step - This function should calculate and update the distribution params
         """
-        self.weights = np.mean(self.responsibilities, axis = 0)
-        self.mus = (1 / (data.shape[0] * self.weights)) * (self.responsibilities.T.dot(data).flatten())
-        for i in range(self.k):
-            self.sigmas[i] = self.responsibilities.T[i].dot((data - self.mus[i])**2)
-            
-        self.sigmas = np.sqrt((1 / (data.shape[0] * self.weights)) * self.sigmas)
+        data = data.reshape(-1, 1)
+        self.weights[:] = np.mean(self.responsibilities, axis = 0)
+        self.mus[:] = (1 / (data.shape[0] * self.weights)) * (self.responsibilities.T.dot(data).flatten())
+        squared_diffs = (data - self.mus)**2
+        self.sigmas[:] = np.sqrt((self.responsibilities * squared_diffs).sum(axis=0) / (data.shape[0] * self.weights))
+        self.update_pdf_constants()
 
     def fit(self, data):
         """
@@ -316,15 +483,14 @@ class EM(object):
         or when you reach n_iter.
         """        
         self.init_params(data)
+        # reshape once, so the E and M steps work on the same float64 column every iteration
+        data = np.asarray(data, dtype=np.float64).reshape(-1, 1)
         for i in range(self.n_iter):  
           self.expectation(data)
           self.maximization(data)
-          cost=0
-          for d in range(data.shape[0]):
-              cost -= np.log2(gmm_pdf(data[d], self.weights,self.mus, self.sigmas))
-              pass
-            
-          self.costs.append(cost)          
+          cost = -self.log_data_pdf.sum() / np.log(2)
+
+          self.costs.append(cost)
           if i>1 and (self.costs[-2] - self.costs[-1]) < self.eps:
               break 
           
@@ -345,11 +511,22 @@ def gmm_pdf(data, weights, mus, sigmas):
     Returns the GMM distribution pdf according to the given mus, sigmas and weights
     for the given data.    
     """
-    k = len(weights)
-    pdf = sum(weights[j] * norm_pdf(data, mus[j], sigmas[j]) for j in range(k))
-    
+    # k is small, so summing the k gaussians one by one on the contiguous data beats
+    # broadcasting a trailing k axis and reducing over it
+    pdf = sum(weights[j] * norm_pdf(data, mus[j], sigmas[j]) for j in range(len(weights)))
+
     return pdf
 
+def fit_em(data, k, random_state):
+    """
+    Fit an EM model with k gaussians on a single feature and return its
+    (weights, mus, sigmas).
+    """
+    em = EM(k, random_state=random_state)
+    em.fit(data)
+
+    return em.get_dist_params()
+
 class NaiveBayesGaussian(object):
     """
     Naive Bayes Classifier using Gaussian Mixture Model (EM) for calculating the likelihood.
@@ -360,13 +537,23 @@ class NaiveBayesGaussian(object):
       Number of gaussians in each dimension
     random_state : int
       Random number generator seed for random params initialization.
+    n_jobs : int
+      Number of EM fits to run in parallel (-1 uses all cores).
     """
 
-    def __init__(self, k=1, random_state=1991):
+    def __init__(self, k=1, random_state=1991, n_jobs=1):
         self.k = k
         self.random_state = random_state
+        self.n_jobs = n_jobs
         self.prior = {}
         self.dist_params = {}
+
+        # the gmm params of every (class, feature) pair stacked into [n_classes, n_features, k] arrays
+        self.classes = None
+        self.log_priors = None
+        self.weights = None
+        self.mus = None
+        self.sigmas = None
         
     def fit(self, X, y):
         """
@@ -380,14 +567,25 @@ class NaiveBayesGaussian(object):
         y : array-like, shape = [n_examples]
           Target values.
         """        
-        for data_class in np.unique(y):
+        classes = np.unique(y)
+        for data_class in classes:
+          self.prior[data_class] = np.mean(y == data_class)
+
+        # every (class, feature) EM is independent, so they are all fitted in parallel
+        jobs = [(data_class, j) for data_class in classes for j in range(X.shape[1])]
+        results = Parallel(n_jobs=self.n_jobs)(
+            delayed(fit_em)(X[y == data_class, j], self.k, self.random_state) for data_class, j in jobs)
+        for data_class in classes:
           self.dist_params[data_class] = []
-          sub_data =  X[y == data_class]
-          self.prior[data_class] = sub_data.shape[0] / X.shape[0]
-          for j in range(sub_data.shape[1]):
-              em = EM(self.k, random_state = self.random_state)
-              em.fit(sub_data[:,j])
-              self.dist_params[data_class].append(em.get_dist_params())
+        for (data_class, j), params in zip(jobs, results):
+          self.dist_params[data_class].append(params)
+
+        self.classes = np.array(list(self.prior.keys()))
+        self.log_priors = np.log([self.prior[data_class] for data_class in self.classes])
+        stacked_params = np.array([self.dist_params[data_class] for data_class in self.classes])
+        self.weights = stacked_params[:, :, 0]
+        self.mus = stacked_params[:, :, 1]
+        self.sigmas = stacked_params[:, :, 2]
 
     def predict(self, X):
         """
@@ -396,18 +594,21 @@ class NaiveBayesGaussian(object):
         ----------
         X : {array-like}, shape = [n_examples, n_features]
         """
-        postiriors_matrix = np.zeros((X.shape[0], 0))
-        for data_class in self.prior.keys():
-            column_posterior = np.ones(X.shape[0])
-            for j in range(X.shape[1]):
-              column_posterior *= gmm_pdf(X[:,j], *self.dist_params[data_class][j])
-            column_posterior *= self.prior[data_class]
-            column_posterior = column_posterior.reshape((-1,1))
-            postiriors_matrix = np.hstack((postiriors_matrix, column_posterior))
-        
-        preds = np.argmax(postiriors_matrix,axis=1)
+        # one contiguous row per feature, so every gmm_pdf call streams over a 1-D array
+        features = np.ascontiguousarray(np.asarray(X).T)
+        log_posteriors = np.empty((X.shape[0], len(self.classes)))
+        for c in range(len(self.classes)):
+            log_posteriors[:, c] = self.log_priors[c]
+            for j in range(features.shape[0]):
+                likelihoods = gmm_pdf(features[j], self.weights[c, j], self.mus[c, j], self.sigmas[c, j])
 
-        return np.array(preds)
+                # sum the log likelihoods instead of multiplying them to avoid underflow
+                with np.errstate(divide='ignore'):
+                    log_posteriors[:, c] += np.log(likelihoods)
+
+        preds = self.classes[np.argmax(log_posteriors, axis=1)]
+
+        return preds
 
 def model_evaluation(x_train, y_train, x_test, y_test, k, best_eta, best_eps):
     ''' 
@@ -495,7 +696,7 @@ def generate_datasets():
            }
 
 # Function for ploting the decision boundaries of a model
-def plot_decision_regions(X, y, classifier, resolution=0.01, title=""):
+def plot_decision_regions(X, y, classifier, resolution=0.01, title="", chunk_size=65536):
 
     # setup marker generator and color map
     markers = ('.', '.')
@@ -506,7 +707,11 @@ def plot_decision_regions(X, y, classifier, resolution=0.01, title=""):
     x2_min, x2_max = X[:, 1].min() - 1, X[:, 1].max() + 1
     xx1, xx2 = np.meshgrid(np.arange(x1_min, x1_max, resolution),
                            np.arange(x2_min, x2_max, resolution))
-    Z = classifier.predict(np.array([xx1.ravel(), xx2.ravel()]).T)
+    # predict the grid in chunks so the classifier's temporaries stay small
+    grid = np.column_stack([xx1.ravel(), xx2.ravel()]).astype(np.float32)
+    Z = np.empty(grid.shape[0], dtype=np.int8)
+    for start in range(0, grid.shape[0], chunk_size):
+        Z[start:start + chunk_size] = classifier.predict(grid[start:start + chunk_size])
     Z = Z.reshape(xx1.shape)
     plt.contourf(xx1, xx2, Z, alpha=0.3, cmap=cmap)
     plt.xlim(xx1.min(), xx1.max())